@@ -10,13 +10,24 @@ Designed for LiteSpeed web server environments.
 """
 
 import argparse
+import functools
+import hashlib
+import os
+import stat
 import subprocess
 import shutil
 import json
 import re
+import calendar
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List, Pattern, Iterator, Callable
+
+try:
+    import orjson  # Optional: much faster summary.json serialization
+except ImportError:
+    orjson = None
 
 # --- Configuration ---
 DEFAULT_OUTPUT_DIR = Path("/home/runcloud/outage_reports")
@@ -26,6 +37,18 @@ DEFAULT_LITESPEED_LOG_DIR = Path("/usr/local/lsws/logs")
 DEFAULT_PHP_CONF_BASE = Path("/etc/php-rc")  # RunCloud PHP configs
 DEFAULT_LSPHP_BASE = Path("/usr/local/lsws")  # LiteSpeed PHP configs
 
+# --- Log timestamp patterns (bytes; group 1 is always the timestamp) ---
+# CLF: host ident authuser [timestamp] ... (host may be IPv4 or IPv6)
+LITESPEED_ACCESS_RE = re.compile(rb'^\S+ \S+ \S+ \[([^\]\n]+)\]')
+LITESPEED_ERROR_RE = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+# '[DD-Mon-YYYY HH:MM:SS]', optionally with a zone name before the ']' (' UTC', ' Europe/Berlin')
+PHP_FPM_SLOW_RE = re.compile(rb'^\[(\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}:\d{2})(?: [^\]\n]+)?\]')
+WORDPRESS_DEBUG_RE = PHP_FPM_SLOW_RE  # Same bracketed format
+
+# --- LiteSpeed handler.conf directives ---
+_HANDLER_ERRORLOG_RE = re.compile(r"^\s*errorlog\s+([^\s{]+)", re.MULTILINE)
+_HANDLER_ACCESSLOG_RE = re.compile(r"^\s*accesslog\s+([^\s{]+)", re.MULTILINE)
+
 
 def setup_arg_parser() -> argparse.ArgumentParser:
     """Sets up the command-line argument parser."""
@@ -45,6 +68,12 @@ def setup_arg_parser() -> argparse.ArgumentParser:
         required=True,
         help="The absolute path to the web application's root directory (e.g., /home/runcloud/webapps/my-app)."
     )
+    parser.add_argument(
+        "--preserve-tree",
+        action="store_true",
+        help="Copy modified files into their app-relative directory tree instead of\n"
+             "flat '<hash>_<name>' files (the manifest maps flat names to source paths)."
+    )
     return parser
 
 
@@ -61,10 +90,9 @@ def run_command(command: list):
         return False, "", f"An unexpected error occurred: {e}"
 
 
-def create_output_directory(base_dir: Path, app_name: str, start_dt: datetime) -> Path:
+def create_output_directory(base_dir: Path, app_name: str, fmt: Dict[str, str]) -> Path:
     """Creates a unique, timestamped directory for the report."""
-    timestamp = start_dt.strftime('%Y%m%d_%H%M%S')
-    output_dir = base_dir / f"{app_name}_{timestamp}"
+    output_dir = base_dir / f"{app_name}_{fmt['dir']}"
     try:
         output_dir.mkdir(parents=True, exist_ok=True)
         print(f"✅ Created report directory: {output_dir}")
@@ -74,123 +102,362 @@ def create_output_directory(base_dir: Path, app_name: str, start_dt: datetime) -
         exit(1)
 
 
+_MONTHS = {
+    b'Jan': 1, b'Feb': 2, b'Mar': 3, b'Apr': 4, b'May': 5, b'Jun': 6,
+    b'Jul': 7, b'Aug': 8, b'Sep': 9, b'Oct': 10, b'Nov': 11, b'Dec': 12
+}
+
+
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+
+def _wall_seconds(year: int, month: int, day: int, hour: int, minute: int, second: int) -> int:
+    """Converts fields to wall-clock seconds; datetime() raises ValueError on out-of-range ones."""
+    days = datetime(year, month, day, hour, minute, second).toordinal() - _EPOCH_ORDINAL
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def _fast_iso(s: bytes, date_sep: int = ord('-')) -> int:
+    """Parses 'YYYY-MM-DD HH:MM:SS' (or with `date_sep` between date fields) to wall-clock seconds."""
+    digits = s.translate(None, b'-/: ')
+    if (len(s) != 19 or len(digits) != 14 or not digits.isdigit() or s[4] != date_sep or s[7] != date_sep
+            or s[10] != 32 or s[13] != 58 or s[16] != 58):
+        raise ValueError(f"Not a fixed-width timestamp: {s!r}")
+    return _wall_seconds(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]), int(s[17:19]))
+
+
+def _fast_dd_mon_yyyy(s: bytes, date_sep: int = ord('-'), time_sep: int = ord(' ')) -> int:
+    """Parses 'DD-Mon-YYYY HH:MM:SS' (or with other date/time separators) to wall-clock seconds."""
+    digits = s[7:].translate(None, b': ')
+    if (len(s) != 20 or len(digits) != 10 or not digits.isdigit() or not s[0:2].isdigit()
+            or s[2] != date_sep or s[6] != date_sep or s[11] != time_sep or s[14] != 58 or s[17] != 58):
+        raise ValueError(f"Not a fixed-width timestamp: {s!r}")
+    return _wall_seconds(int(s[7:11]), _MONTHS[s[3:6]], int(s[0:2]), int(s[12:14]), int(s[15:17]), int(s[18:20]))
+
+
+def _fast_clf(s: bytes) -> int:
+    """Parses CLF 'DD/Mon/YYYY:HH:MM:SS +ZZZZ' to wall-clock seconds; the offset is checked, then dropped."""
+    zone = s[21:26]
+    if (len(s) != 26 or s[20:21] != b' ' or zone[0:1] not in (b'+', b'-') or not zone[1:].isdigit()
+            or zone[1:3] > b'23' or zone[3:4] > b'5'):
+        raise ValueError(f"Not a fixed-width CLF timestamp: {s!r}")
+    return _fast_dd_mon_yyyy(s[:20], ord('/'), ord(':'))
+
+
+# Fixed-width fast paths for the log date formats in use, keyed by strptime format.
+# They work on the raw bytes captured from the log, so no decoding is needed, and
+# raise on anything they don't fully validate so strptime gets the final say.
+FAST_PARSERS = {
+    '%Y-%m-%d %H:%M:%S': _fast_iso,
+    '%Y/%m/%d %H:%M:%S': functools.partial(_fast_iso, date_sep=ord('/')),
+    '%d-%b-%Y %H:%M:%S': _fast_dd_mon_yyyy,
+    '%d/%b/%Y:%H:%M:%S %z': _fast_clf,
+}
+
+
+# --- Timestamp extractors: slice the raw timestamp out of a line without a regex ---
+def _extract_clf_ts(line: bytes) -> Optional[bytes]:
+    """Returns the text between the first '[' and the next ']' (CLF access logs)."""
+    i = line.find(b'[')
+    if i < 0:
+        return None
+    j = line.find(b']', i + 1)
+    return line[i + 1:j] if j >= 0 else None
+
+
+def _extract_leading_ts(line: bytes) -> bytes:
+    """Returns the 'YYYY-MM-DD HH:MM:SS' timestamp at column 0 (LiteSpeed error logs)."""
+    return line[0:19]
+
+
+def _extract_bracketed_ts(line: bytes) -> bytes:
+    """Returns the '[DD-Mon-YYYY HH:MM:SS' timestamp at column 1 (PHP-FPM slow, WordPress debug)."""
+    return line[1:21]
+
+
+def _search_ts(pattern: Pattern, line: bytes) -> Optional[bytes]:
+    """Default extractor: group 1 of the log's timestamp regex."""
+    m = pattern.search(line)
+    return m.group(1) if m else None
+
+
+def _passes_sentinel(line: bytes, sentinel: Optional[bytes], sentinel_pos: Optional[int]) -> bool:
+    """Cheap literal pre-check: the sentinel must occur in the line, or at `sentinel_pos` if set."""
+    if sentinel is None:
+        return True
+    if sentinel_pos is None:
+        return sentinel in line
+    return line[sentinel_pos:sentinel_pos + len(sentinel)] == sentinel
+
+
+def _parse_ts(raw_ts: bytes, fast_parser: Optional[Callable[[bytes], int]], date_format: str) -> Optional[int]:
+    """Parses a raw timestamp to wall-clock seconds, falling back to strptime; None if unparseable."""
+    if fast_parser is not None:
+        try:
+            return fast_parser(raw_ts)
+        except (KeyError, ValueError):
+            pass
+    try:
+        return calendar.timegm(datetime.strptime(raw_ts.decode('ascii'), date_format).timetuple())
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+
+def _line_candidates(
+    f, sentinel: Optional[bytes], sentinel_pos: Optional[int],
+    extractor: Callable[[bytes], Optional[bytes]]
+) -> Iterator[Tuple[bytes, bytes]]:
+    """Yields (line, raw timestamp) for each line that passes the sentinel and extractor."""
+    for line in f:
+        if not _passes_sentinel(line, sentinel, sentinel_pos):
+            continue
+        raw_ts = extractor(line)
+        if raw_ts:
+            yield line, raw_ts
+
+
 def parse_log_slice(
     log_path: Path, start_dt: datetime, end_dt: datetime,
-    date_regex: str, date_format: str
-) -> Optional[str]:
-    """Extracts lines from a log file that fall within a given time window."""
+    pattern: Pattern, date_format: str, out_path: Path,
+    sentinel: Optional[bytes] = None, sentinel_pos: Optional[int] = None,
+    extractor: Optional[Callable[[bytes], Optional[bytes]]] = None,
+    log: Callable[[str], None] = print
+) -> int:
+    """Streams lines from a log file that fall within a given time window to `out_path`; returns the count."""
     if not log_path.is_file():
-        print(f"   - ⚠️  Log file not found: {log_path}")
-        return None
-    relevant_lines = []
-    pattern = re.compile(date_regex)
+        log(f"   - ⚠️  Log file not found: {log_path}")
+        return 0
+    written = 0
+    out = None
+    # Timestamps are compared as log-local wall-clock seconds; any %z offset is dropped.
+    start_ts = calendar.timegm(start_dt.timetuple())
+    end_ts = calendar.timegm(end_dt.timetuple())
+    fast_parser = FAST_PARSERS.get(date_format)
+    if extractor is None:
+        extractor = functools.partial(_search_ts, pattern)
+    try:
+        with open(log_path, 'rb', buffering=1024 * 1024) as f:
+            for line, raw_ts in _line_candidates(f, sentinel, sentinel_pos, extractor):
+                ts = _parse_ts(raw_ts, fast_parser, date_format)
+                if ts is not None and start_ts <= ts <= end_ts:
+                    if out is None:
+                        out = open(out_path, 'wb', buffering=1024 * 1024)
+                    out.write(line)
+                    written += 1
+    except Exception as e:
+        log(f"   - ❌ Error reading {log_path}: {e}")
+    finally:
+        if out is not None:
+            out.close()
+    return written
+
+
+def _multi_line_candidates(f, specs: List[tuple]) -> Iterator[Tuple[int, bytes, int]]:
+    """Yields (entry index, line, timestamp) for the first spec that parses each line."""
+    for line in f:
+        for i, (sentinel, sentinel_pos, extractor, fast_parser, date_format) in enumerate(specs):
+            if not _passes_sentinel(line, sentinel, sentinel_pos):
+                continue
+            raw_ts = extractor(line)
+            ts = _parse_ts(raw_ts, fast_parser, date_format) if raw_ts else None
+            if ts is not None:
+                yield i, line, ts
+                break
+
+
+def parse_log_slices(
+    log_path: Path, start_dt: datetime, end_dt: datetime, entries: List[tuple],
+    log: Callable[[str], None] = print
+) -> List[int]:
+    """Single-pass parse_log_slice for several log types on one file; returns a line count per entry."""
+    written = [0] * len(entries)
+    outs = [None] * len(entries)
+    if not log_path.is_file():
+        log(f"   - ⚠️  Log file not found: {log_path}")
+        return written
+    start_ts = calendar.timegm(start_dt.timetuple())
+    end_ts = calendar.timegm(end_dt.timetuple())
+    specs = [
+        (sentinel, sentinel_pos, extractor or functools.partial(_search_ts, pattern),
+         FAST_PARSERS.get(date_format), date_format)
+        for pattern, date_format, _, sentinel, sentinel_pos, extractor in entries
+    ]
     try:
-        with log_path.open('r', errors='ignore') as f:
-            for line in f:
-                match = pattern.search(line)
-                if not match: continue
+        with open(log_path, 'rb', buffering=1024 * 1024) as f:
+            for i, line, ts in _multi_line_candidates(f, specs):
+                if start_ts <= ts <= end_ts:
+                    if outs[i] is None:
+                        outs[i] = open(entries[i][2], 'wb', buffering=1024 * 1024)
+                    outs[i].write(line)
+                    written[i] += 1
+    except Exception as e:
+        log(f"   - ❌ Error reading {log_path}: {e}")
+    finally:
+        for out in outs:
+            if out is not None:
+                out.close()
+    return written
+
+
+_LOG_SPEC_KEYS = ("regex", "format", "sentinel", "sentinel_pos", "extractor")
+
+
+def _plan_log_scans(logs_to_collect: dict) -> Tuple[List[List[str]], Dict[str, str]]:
+    """Groups configured logs into one scan per physical file, and maps exact duplicates to an alias."""
+    by_file: Dict[tuple, List[str]] = {}
+    aliases = {}
+    seen_specs: Dict[tuple, str] = {}
+    for name, config in logs_to_collect.items():
+        try:
+            st = os.stat(config["path"])
+            file_key = (st.st_dev, st.st_ino)
+        except OSError:
+            file_key = (str(config["path"]),)  # Missing; parse_log_slice reports it
+        spec_key = file_key + tuple(config.get(k) for k in _LOG_SPEC_KEYS)
+        if spec_key in seen_specs:
+            aliases[name] = seen_specs[spec_key]
+            continue
+        seen_specs[spec_key] = name
+        by_file.setdefault(file_key, []).append(name)
+    return list(by_file.values()), aliases
+
+
+def _walk_modified(root: str, start_ns: int, end_ns: int) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """Yields (path, relative path, stat) for regular files under root with start_ns < st_mtime_ns <= end_ns."""
+    stack = [(root, "")]
+    while stack:
+        dir_path, rel_prefix = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
                 try:
-                    log_dt = datetime.strptime(match.group(1), date_format)
-                    if start_dt <= log_dt <= end_dt:
-                        relevant_lines.append(line)
-                except ValueError:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
                     continue
-    except Exception as e:
-        print(f"   - ❌ Error reading {log_path}: {e}")
-        return None
-    return "".join(relevant_lines) if relevant_lines else None
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append((entry.path, rel_prefix + entry.name + os.sep))
+                elif stat.S_ISREG(st.st_mode) and start_ns < st.st_mtime_ns <= end_ns:
+                    yield entry.path, rel_prefix + entry.name, st
+
+
+def _safe_text(text: str) -> str:
+    """Renders surrogate-escaped (undecodable) filesystem names as \\xNN so they can be printed or written as UTF-8."""
+    return os.fsencode(text).decode('utf-8', 'backslashreplace')
+
+
+def _copy_with_stat(source: str, dest: Path, st: os.stat_result) -> None:
+    """Copies a file via os.sendfile (buffered fallback), then applies the mode and times from `st`."""
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        try:
+            offset = 0
+            while offset < st.st_size:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, st.st_size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            dst.seek(0)
+            dst.truncate()
+            shutil.copyfileobj(src, dst)
+    os.chmod(dest, stat.S_IMODE(st.st_mode))
+    os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
 
 
 def collect_modified_files(
-    output_dir: Path, app_path: Path, start_dt: datetime, end_dt: datetime
+    output_dir: Path, app_path: Path, start_dt: datetime, end_dt: datetime,
+    fmt: Dict[str, str], preserve_tree: bool = False, log: Callable[[str], None] = print
 ) -> dict:
-    """Finds and copies all files within the app path modified during the outage."""
-    print("\n[+] Searching for files modified during the outage...")
+    """Copies files in the app path modified during the outage into modified_files/ and writes a manifest."""
+    log("\n[+] Searching for files modified during the outage...")
     results = {"copied_files": [], "manifest_path": ""}
     
     if not app_path.is_dir():
-        print(f"   - ❌ Error: Application path does not exist: {app_path}")
+        log(f"   - ❌ Error: Application path does not exist: {app_path}")
         results["error"] = "Application path not found."
         return results
 
-    # Format dates for the `find` command
-    start_str = start_dt.strftime('%Y-%m-%d %H:%M:%S')
-    end_str = end_dt.strftime('%Y-%m-%d %H:%M:%S')
-    
-    cmd = [
-        "find", str(app_path),
-        "-type", "f",
-        "-newermt", start_str,
-        "-not", "-newermt", end_str
-    ]
-    
-    success, stdout, stderr = run_command(cmd)
-    
-    if not success:
-        print(f"   - ❌ Error running find command: {stderr}")
-        results["error"] = stderr
-        return results
-
-    modified_files = stdout.strip().split('\n')
-    if not modified_files or not modified_files[0]:
-        print("   - ✅ No files were modified during the outage window.")
+    # Same window as `find -newermt start -not -newermt end` (local time), compared
+    # in integer nanoseconds as find does; the bounds are whole seconds.
+    start_ns = int(start_dt.timestamp()) * 1_000_000_000
+    end_ns = int(end_dt.timestamp()) * 1_000_000_000
+    modified_files = list(_walk_modified(str(app_path), start_ns, end_ns))
+    if not modified_files:
+        log("   - ✅ No files were modified during the outage window.")
         return results
 
-    print(f"   - Found {len(modified_files)} modified file(s). Copying...")
+    log(f"   - Found {len(modified_files)} modified file(s). Copying...")
     
+    # Directories are created on first use, so nothing is left behind if every copy fails.
     dest_dir = output_dir / "modified_files"
-    dest_dir.mkdir()
-    
+    dest_dir_existed = dest_dir.exists()  # A re-run of the same window reuses the report dir
+    seen_dirs = set()
+
+    # Per-file results are kept as parallel columns filled in one pass, then
+    # each consumer (manifest, copied_files) reads just the columns it needs.
+    n = len(modified_files)
+    src_col = [file_str for file_str, _, _ in modified_files]
+    dst_col = [None] * n
+    err_col = [None] * n
+    ok_col = bytearray(n)
+    for i, (file_str, relative_path, st) in enumerate(modified_files):
+        try:
+            if preserve_tree:
+                dest_file_path = dest_dir / relative_path
+            else:
+                h = hashlib.sha1(os.fsencode(relative_path)).hexdigest()[:12]
+                dest_file_path = dest_dir / f"{h}_{os.path.basename(relative_path)}"
+            dst_col[i] = str(dest_file_path)
+            if dest_file_path.parent not in seen_dirs:
+                dest_file_path.parent.mkdir(parents=True, exist_ok=True)
+                seen_dirs.add(dest_file_path.parent)
+            _copy_with_stat(file_str, dest_file_path, st)
+            ok_col[i] = 1
+        except Exception as e:
+            log(f"   - ⚠️  Could not copy {_safe_text(file_str)}: {_safe_text(str(e))}")
+            err_col[i] = e
+
     manifest_path = output_dir / "modified_files_manifest.txt"
-    with manifest_path.open('w') as f:
-        f.write(f"# Files modified between {start_str} and {end_str}\n\n")
-        for file_str in modified_files:
-            if not file_str: continue
-            
-            source_file = Path(file_str)
-            relative_path = source_file.relative_to(app_path)
-            dest_file_path = dest_dir / relative_path
-            dest_file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            try:
-                shutil.copy2(source_file, dest_file_path)
-                f.write(f"{file_str}\n")
-                results["copied_files"].append(str(dest_file_path))
-            except Exception as e:
-                error_msg = f"   - ⚠️  Could not copy {source_file}: {e}"
-                print(error_msg)
-                f.write(f"# FAILED TO COPY: {file_str} - REASON: {e}\n")
-    
+    header = f"# Files modified between {fmt['start_full']} and {fmt['end_full']}\n"
+    if not preserve_tree:
+        header += "# <copied file name>\t<source path>\n"
+    entries = [
+        (_safe_text(src) if preserve_tree else _safe_text(f"{os.path.basename(dst)}\t{src}")) if ok
+        else _safe_text(f"# FAILED TO COPY: {src} - REASON: {err}")
+        for src, dst, ok, err in zip(src_col, dst_col, ok_col, err_col)
+    ]
+    manifest_path.write_text(header + "\n" + "\n".join(entries) + "\n", encoding='utf-8')
+    results["copied_files"] = [_safe_text(dst) for dst, ok in zip(dst_col, ok_col) if ok]
+    if not results["copied_files"] and seen_dirs and not dest_dir_existed:
+        shutil.rmtree(dest_dir, ignore_errors=True)
+
     results["manifest_path"] = str(manifest_path)
-    print(f"   - ✅ Copied modified files and created manifest.")
+    log(f"   - ✅ Copied {len(results['copied_files'])} of {len(modified_files)} modified file(s) and created manifest.")
     return results
 
 
-def collect_sar_data(output_dir: Path, start_dt: datetime, end_dt: datetime) -> dict:
-    print("\n[+] Collecting historical system performance data with `sar`...")
-    results = {}
-    start_time_str = start_dt.strftime('%H:%M:%S')
-    end_time_str = end_dt.strftime('%H:%M:%S')
-    sar_commands = { 
-        "cpu_usage": ["sar", "-u", "-s", start_time_str, "-e", end_time_str], 
-        "memory_usage": ["sar", "-r", "-s", start_time_str, "-e", end_time_str], 
-        "load_average": ["sar", "-q", "-s", start_time_str, "-e", end_time_str] 
-    }
-    for key, cmd in sar_commands.items():
-        success, stdout, stderr = run_command(cmd)
-        if not success or "Cannot open" in stderr:
-            print(f"   - ⚠️  Could not collect {key}. Is `sysstat` installed?")
-            results[key] = f"Error: {stderr}"
-        else:
-            output_file = output_dir / f"sar_{key}.txt"
-            output_file.write_text(stdout)
-            results[key] = str(output_file)
-            print(f"   - ✅ Saved {key} data to {output_file.name}")
-    return results
+def collect_sar_data(fmt: Dict[str, str], log: Callable[[str], None] = print) -> dict:
+    """Returns CPU, memory and load metrics for the outage window as parsed `sadf -j` JSON (local time via -t)."""
+    log("\n[+] Collecting historical system performance data with `sadf`...")
+    cmd = ["sadf", "-j", "-t", "-s", fmt['start_hms'], "-e", fmt['end_hms'], "--", "-u", "-r", "-q"]
+    success, stdout, stderr = run_command(cmd)
+    if not success or "Cannot open" in stderr:
+        log("   - ⚠️  Could not collect performance data. Is `sysstat` installed?")
+        return {"error": stderr}
+    try:
+        data = json.loads(stdout)
+    except ValueError as e:
+        log(f"   - ⚠️  Could not parse `sadf` output: {e}")
+        return {"error": f"Invalid JSON from sadf: {e}"}
+    log("   - ✅ Collected CPU, memory and load average data into the summary")
+    return data
 
 
+@functools.lru_cache(maxsize=32)
 def get_log_paths_from_handler_conf(app_name: str) -> Dict[str, Path]:
-    """Parses the LiteSpeed handler.conf to find log paths."""
+    """Parses the LiteSpeed handler.conf to find log paths (memoized per app; treat the result as read-only)."""
     handler_conf_path = Path(f"/etc/lsws-rc/conf.d/{app_name}.d/handler.conf")
     log_paths = {}
 
@@ -201,8 +468,8 @@ def get_log_paths_from_handler_conf(app_name: str) -> Dict[str, Path]:
     print(f"   - ℹ️  Parsing {handler_conf_path} for log locations...")
     try:
         content = handler_conf_path.read_text()
-        errorlog_match = re.search(r"^\s*errorlog\s+([^\s{]+)", content, re.MULTILINE)
-        accesslog_match = re.search(r"^\s*accesslog\s+([^\s{]+)", content, re.MULTILINE)
+        errorlog_match = _HANDLER_ERRORLOG_RE.search(content)
+        accesslog_match = _HANDLER_ACCESSLOG_RE.search(content)
 
         if errorlog_match:
             log_paths["litespeed_error"] = Path(errorlog_match.group(1))
@@ -217,8 +484,10 @@ def get_log_paths_from_handler_conf(app_name: str) -> Dict[str, Path]:
     return log_paths
 
 
-def collect_config_files(output_dir: Path, app_name: str, php_version: str) -> dict:
-    print("\n[+] Collecting LiteSpeed and PHP configuration files...")
+def collect_config_files(
+    output_dir: Path, app_name: str, php_version: str, log: Callable[[str], None] = print
+) -> dict:
+    log("\n[+] Collecting LiteSpeed and PHP configuration files...")
     results = {}
     
     # LiteSpeed Virtual Host Configuration
@@ -227,13 +496,13 @@ def collect_config_files(output_dir: Path, app_name: str, php_version: str) -> d
         try:
             shutil.copy(vhost_conf_path, output_dir)
             results["litespeed_vhost_config"] = str(output_dir / vhost_conf_path.name)
-            print(f"   - ✅ Copied LiteSpeed VHost config: {vhost_conf_path.name}")
+            log(f"   - ✅ Copied LiteSpeed VHost config: {vhost_conf_path.name}")
         except PermissionError:
             results["litespeed_vhost_config"] = "Access denied (requires root/lsadm permissions)"
-            print(f"   - ⚠️  Cannot access LiteSpeed VHost config: Permission denied")
+            log(f"   - ⚠️  Cannot access LiteSpeed VHost config: Permission denied")
     else:
         results["litespeed_vhost_config"] = "Not found"
-        print(f"   - ⚠️  LiteSpeed VHost config not found: {vhost_conf_path}")
+        log(f"   - ⚠️  LiteSpeed VHost config not found: {vhost_conf_path}")
 
     # Main LiteSpeed Configuration (if accessible)
     main_conf_path = Path("/usr/local/lsws/conf/httpd_config.conf")
@@ -241,10 +510,10 @@ def collect_config_files(output_dir: Path, app_name: str, php_version: str) -> d
         try:
             shutil.copy(main_conf_path, output_dir / "litespeed_main_config.conf")
             results["litespeed_main_config"] = str(output_dir / "litespeed_main_config.conf")
-            print(f"   - ✅ Copied LiteSpeed main config")
+            log(f"   - ✅ Copied LiteSpeed main config")
         except PermissionError:
             results["litespeed_main_config"] = "Access denied (requires root/lsadm permissions)"
-            print(f"   - ⚠️  Cannot access LiteSpeed main config: Permission denied")
+            log(f"   - ⚠️  Cannot access LiteSpeed main config: Permission denied")
     else:
         results["litespeed_main_config"] = "Not found"
 
@@ -253,10 +522,10 @@ def collect_config_files(output_dir: Path, app_name: str, php_version: str) -> d
     if php_conf_path.is_file():
         shutil.copy(php_conf_path, output_dir)
         results["php_fpm_config"] = str(output_dir / php_conf_path.name)
-        print(f"   - ✅ Copied PHP-FPM config: {php_conf_path.name}")
+        log(f"   - ✅ Copied PHP-FPM config: {php_conf_path.name}")
     else:
         results["php_fpm_config"] = "Not found"
-        print(f"   - ⚠️  PHP-FPM config not found: {php_conf_path}")
+        log(f"   - ⚠️  PHP-FPM config not found: {php_conf_path}")
 
     # LiteSpeed PHP Configuration
     lsphp_conf_path = DEFAULT_LSPHP_BASE / f"lsphp{php_version.replace('.', '')}" / "etc" / "php" / php_version / "litespeed" / "php.ini"
@@ -264,17 +533,35 @@ def collect_config_files(output_dir: Path, app_name: str, php_version: str) -> d
         try:
             shutil.copy(lsphp_conf_path, output_dir / f"lsphp{php_version}_config.ini")
             results["lsphp_config"] = str(output_dir / f"lsphp{php_version}_config.ini")
-            print(f"   - ✅ Copied LSPHP config: lsphp{php_version}_config.ini")
+            log(f"   - ✅ Copied LSPHP config: lsphp{php_version}_config.ini")
         except Exception as e:
             results["lsphp_config"] = f"Error copying: {e}"
-            print(f"   - ⚠️  Error copying LSPHP config: {e}")
+            log(f"   - ⚠️  Error copying LSPHP config: {e}")
     else:
         results["lsphp_config"] = "Not found"
-        print(f"   - ⚠️  LSPHP config not found: {lsphp_conf_path}")
+        log(f"   - ⚠️  LSPHP config not found: {lsphp_conf_path}")
 
     return results
 
 
+def _buffered_call(fn, *args) -> Tuple[object, List[str]]:
+    """Runs fn(*args) with its console messages buffered; returns (result, messages) for the parent to print."""
+    messages = []
+    return fn(*args, log=messages.append), messages
+
+
+def _collector_result(future, label: str, messages: List[str]) -> dict:
+    """Prints a collector's buffered messages and returns its result, or an error entry if it raised."""
+    try:
+        return future.result()
+    except Exception as e:
+        messages.append(f"   - ❌ {label} failed: {type(e).__name__}: {e}")
+        return {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        for message in messages:
+            print(message)
+
+
 def main():
     """Main execution function."""
     parser = setup_arg_parser()
@@ -287,7 +574,16 @@ def main():
         print("❌ Critical Error: Invalid date format. Use 'YYYY-MM-DD HH:MM:SS'.")
         exit(1)
 
-    report_dir = create_output_directory(args.output_dir, args.app_name, start_dt)
+    # Every collector formats the window from these, so their timestamps can't drift apart.
+    fmt = {
+        'dir': start_dt.strftime('%Y%m%d_%H%M%S'),
+        'start_full': start_dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'end_full': end_dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'start_hms': start_dt.strftime('%H:%M:%S'),
+        'end_hms': end_dt.strftime('%H:%M:%S')
+    }
+
+    report_dir = create_output_directory(args.output_dir, args.app_name, fmt)
     collection_results = {"report_directory": str(report_dir)}
 
     print("\n[+] Collecting application log slices...")
@@ -297,55 +593,138 @@ def main():
     logs_to_collect = {
         "litespeed_access": {
             "path": handler_log_paths.get("litespeed_access", args.log_dir / f"{args.app_name}_access.log"),
-            "regex": r'^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) - - \[([^\]]+)\]',
-            "format": '%d/%b/%Y:%H:%M:%S %z'
+            "regex": LITESPEED_ACCESS_RE,
+            "format": '%d/%b/%Y:%H:%M:%S %z',
+            "sentinel": b"[",
+            "sentinel_pos": None,
+            "extractor": _extract_clf_ts
         },
         "litespeed_error": {
             "path": handler_log_paths.get("litespeed_error", args.log_dir / f"{args.app_name}_error.log"),
-            "regex": r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})',
-            "format": '%Y-%m-%d %H:%M:%S'
+            "regex": LITESPEED_ERROR_RE,
+            "format": '%Y-%m-%d %H:%M:%S',
+            "sentinel": b"-",
+            "sentinel_pos": 4,
+            "extractor": _extract_leading_ts
         },
         "litespeed_access_alt": {
             "path": DEFAULT_LITESPEED_LOG_DIR / f"{args.app_name}.access.log",
-            "regex": r'^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) - - \[([^\]]+)\]',
-            "format": '%d/%b/%Y:%H:%M:%S %z'
+            "regex": LITESPEED_ACCESS_RE,
+            "format": '%d/%b/%Y:%H:%M:%S %z',
+            "sentinel": b"[",
+            "sentinel_pos": None,
+            "extractor": _extract_clf_ts
         },
         "litespeed_error_alt": {
             "path": DEFAULT_LITESPEED_LOG_DIR / f"{args.app_name}.error.log",
-            "regex": r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})',
-            "format": '%Y-%m-%d %H:%M:%S'
+            "regex": LITESPEED_ERROR_RE,
+            "format": '%Y-%m-%d %H:%M:%S',
+            "sentinel": b"-",
+            "sentinel_pos": 4,
+            "extractor": _extract_leading_ts
         },
         "php_fpm_slow": {
             "path": Path(f"/var/log/php/php{args.php_version}-fpm-slow.log"),
-            "regex": r'^\[(\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}:\d{2})\]',
-            "format": '%d-%b-%Y %H:%M:%S'
+            "regex": PHP_FPM_SLOW_RE,
+            "format": '%d-%b-%Y %H:%M:%S',
+            "sentinel": b"[",
+            "sentinel_pos": 0,
+            "extractor": _extract_bracketed_ts
         },
         "wordpress_debug": {
             "path": args.app_path / "wp-content" / "debug.log",
-            "regex": r'^\[(\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}:\d{2}) UTC\]',
-            "format": '%d-%b-%Y %H:%M:%S'
+            "regex": WORDPRESS_DEBUG_RE,
+            "format": '%d-%b-%Y %H:%M:%S',
+            "sentinel": b"[",
+            "sentinel_pos": 0,
+            "extractor": _extract_bracketed_ts
         }
     }
 
-    collection_results["logs"] = {}
-    for name, config in logs_to_collect.items():
-        content = parse_log_slice(config["path"], start_dt, end_dt, config["regex"], config["format"])
-        if content:
-            output_file = report_dir / f"{name}.slice.log"
-            output_file.write_text(content)
-            collection_results["logs"][name] = str(output_file)
-            print(f"   - ✅ Saved log slice: {output_file.name}")
-        else:
-            collection_results["logs"][name] = "No relevant entries or file missing."
-
-    # Collect all data
-    collection_results["modified_files_data"] = collect_modified_files(report_dir, args.app_path, start_dt, end_dt)
-    collection_results["sar_data"] = collect_sar_data(report_dir, start_dt, end_dt)
-    collection_results["configs"] = collect_config_files(report_dir, args.app_name, args.php_version)
+    # Scan each physical log file once: entries that resolve to the same file
+    # share a single pass, and exact duplicates reuse the earlier slice.
+    scans, aliases = _plan_log_scans(logs_to_collect)
+    for alias, name in aliases.items():
+        print(f"   - ℹ️  {alias} is the same log as {name}; sharing its slice.")
+
+    # Slice each log file in its own process (CPU-bound), and run the IO-bound
+    # collectors on threads alongside. The process pool is started first so
+    # its workers are forked before any collector threads exist. Workers and
+    # collectors buffer their messages, and each section is printed here once
+    # its result is in, so the console report stays in section order.
+    collection_results["logs"] = {name: "No relevant entries or file missing." for name in logs_to_collect}
+    log_workers = min(len(scans), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=log_workers) as log_pool, ThreadPoolExecutor(max_workers=3) as io_pool:
+        log_futures = {}
+        for names in scans:
+            output_files = [report_dir / f"{name}.slice.log" for name in names]
+            configs = [logs_to_collect[name] for name in names]
+            try:
+                if len(names) == 1:
+                    config = configs[0]
+                    future = log_pool.submit(
+                        _buffered_call, parse_log_slice, config["path"], start_dt, end_dt, config["regex"], config["format"],
+                        output_files[0], config.get("sentinel"), config.get("sentinel_pos"), config.get("extractor")
+                    )
+                else:
+                    entries = [
+                        (config["regex"], config["format"], output_file,
+                         config.get("sentinel"), config.get("sentinel_pos"), config.get("extractor"))
+                        for config, output_file in zip(configs, output_files)
+                    ]
+                    future = log_pool.submit(_buffered_call, parse_log_slices, configs[0]["path"], start_dt, end_dt, entries)
+            except Exception as e:
+                # The pool broke before this scan could be queued.
+                for name in names:
+                    collection_results["logs"][name] = f"Error: {type(e).__name__}: {e}"
+                continue
+            log_futures[future] = list(zip(names, output_files))
+
+        modified_messages, sar_messages, configs_messages = [], [], []
+        modified_future = io_pool.submit(
+            collect_modified_files, report_dir, args.app_path, start_dt, end_dt, fmt, args.preserve_tree,
+            log=modified_messages.append
+        )
+        sar_future = io_pool.submit(collect_sar_data, fmt, log=sar_messages.append)
+        configs_future = io_pool.submit(
+            collect_config_files, report_dir, args.app_name, args.php_version, log=configs_messages.append
+        )
+
+        for future, scanned in log_futures.items():
+            try:
+                line_counts, messages = future.result()
+            except Exception as e:
+                # Covers BrokenProcessPool too (worker OOM-killed, SIGBUS on a truncated log, ...).
+                error = f"Error: {type(e).__name__}: {e}"
+                print(f"   - ❌ Slicing failed for {', '.join(name for name, _ in scanned)}: {error}")
+                for name, _ in scanned:
+                    collection_results["logs"][name] = error
+                continue
+            for message in messages:
+                print(message)
+            if len(scanned) == 1:
+                line_counts = [line_counts]
+            for (name, output_file), line_count in zip(scanned, line_counts):
+                if line_count:
+                    collection_results["logs"][name] = str(output_file)
+                    print(f"   - ✅ Saved log slice: {output_file.name} ({line_count} lines)")
+        for alias, name in aliases.items():
+            collection_results["logs"][alias] = collection_results["logs"][name]
+
+        collection_results["modified_files_data"] = _collector_result(
+            modified_future, "Modified file collection", modified_messages
+        )
+        collection_results["sar_data"] = _collector_result(sar_future, "Performance data collection", sar_messages)
+        collection_results["configs"] = _collector_result(configs_future, "Config collection", configs_messages)
     
+    # collection_results holds only JSON-native values (paths are stored as str),
+    # so neither encoder needs a default hook.
     summary_file = report_dir / "summary.json"
-    with summary_file.open('w') as f:
-        json.dump(collection_results, f, indent=4)
+    if orjson is not None:
+        summary_file.write_bytes(orjson.dumps(collection_results, option=orjson.OPT_INDENT_2))
+    else:
+        with summary_file.open('w') as f:
+            json.dump(collection_results, f, indent=4)
         
     print(f"\n✨ Snapshot complete! All data saved in:\n{report_dir}")
 